@@ -9,6 +9,8 @@ from datetime import datetime
 import pandas as pd
 import time
 import math
+import queue
+import threading
 
 # Initialize MediaPipe
 mp_pose = mp.solutions.pose
@@ -374,6 +376,185 @@ def draw_pose_landmarks(image, landmarks):
     
     return image
 
+def draw_video_overlay(image, landmarks, energy, style_config, move_detected, move_count):
+    """Burn skeleton, move events and a live energy meter into a video frame"""
+    if landmarks:
+        draw_pose_landmarks(image, landmarks)
+    
+    h, w = image.shape[:2]
+    
+    # Energy meter (same scale as the energy score)
+    energy_level = min(100, energy * style_config["energy_multiplier"] * 1000)
+    meter_x, meter_y = 20, 20
+    meter_w, meter_h = 24, max(60, h // 3)
+    fill_h = int(meter_h * energy_level / 100)
+    cv2.rectangle(image, (meter_x, meter_y), (meter_x + meter_w, meter_y + meter_h), (255, 255, 255), 2)
+    cv2.rectangle(
+        image,
+        (meter_x + 2, meter_y + meter_h - fill_h),
+        (meter_x + meter_w - 2, meter_y + meter_h - 2),
+        (6, 119, 217),
+        -1
+    )
+    cv2.putText(image, f"Energy {energy_level:.0f}%", (meter_x, meter_y + meter_h + 25),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+    
+    # Move events
+    cv2.putText(image, f"Moves: {move_count}", (w - 180, 40),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
+    if move_detected:
+        cv2.putText(image, "MOVE!", (w // 2 - 60, 60),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 215, 255), 4)
+    
+    return image
+
+class AnnotatedVideoExporter:
+    """Render overlay frames and encode them with cv2.VideoWriter on a background thread.
+    
+    Frames are handed over through a bounded queue so encoding overlaps with
+    pose analysis while memory use stays capped.
+    """
+    
+    def __init__(self, output_path, fps, frame_size, style_config, total_frames=0, queue_size=32):
+        self.output_path = output_path
+        self.style_config = style_config
+        self.total_frames = total_frames
+        self.frames_written = 0
+        self.error = None
+        self.frame_queue = queue.Queue(maxsize=queue_size)
+        self.cancel_event = threading.Event()
+        
+        self.frame_size = tuple(frame_size)
+        self.writer = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*"mp4v"), fps, self.frame_size)
+        if not self.writer.isOpened():
+            raise IOError(f"Could not open video writer for {output_path}")
+        
+        self.worker = threading.Thread(target=self._encode_loop, daemon=True)
+        self.worker.start()
+    
+    def _encode_loop(self):
+        """Worker loop: render overlays and write frames until the end marker"""
+        try:
+            while not self.cancel_event.is_set():
+                item = self.frame_queue.get()
+                if item is None:
+                    break
+                frame, landmarks, energy, move_detected, move_count = item
+                draw_video_overlay(frame, landmarks, energy, self.style_config, move_detected, move_count)
+                # VideoWriter silently drops frames that don't match its size
+                if frame.shape[1::-1] != self.frame_size:
+                    frame = cv2.resize(frame, self.frame_size)
+                self.writer.write(frame)
+                self.frames_written += 1
+        except Exception as e:
+            self.error = e
+            self.cancel_event.set()
+        finally:
+            self.writer.release()
+    
+    def submit(self, frame, landmarks, energy, move_detected, move_count):
+        """Queue a frame for encoding, blocking while the queue is full.
+        
+        Returns False if the export was cancelled or the worker failed.
+        """
+        item = (frame, landmarks, energy, move_detected, move_count)
+        while not self.cancel_event.is_set():
+            try:
+                self.frame_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def finish(self):
+        """Flush remaining frames and wait for the encoder to finish"""
+        while self.worker.is_alive():
+            try:
+                self.frame_queue.put(None, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        self.worker.join()
+        if self.error is not None:
+            raise self.error
+    
+    def cancel(self):
+        """Stop encoding, drop queued frames and remove the partial output"""
+        self.cancel_event.set()
+        while True:
+            try:
+                self.frame_queue.get_nowait()
+            except queue.Empty:
+                break
+        self.frame_queue.put(None)
+        self.worker.join()
+        if os.path.exists(self.output_path):
+            os.remove(self.output_path)
+    
+    @property
+    def progress(self):
+        """Fraction of frames encoded so far"""
+        if self.total_frames <= 0:
+            return 0.0
+        return min(1.0, self.frames_written / self.total_frames)
+
+def export_annotated_video(video_path, output_path, style_config, progress_callback=None):
+    """Analyze a video and export it with pose overlays, encoding in the background"""
+    capture = cv2.VideoCapture(video_path)
+    if not capture.isOpened():
+        raise IOError(f"Could not open video {video_path}")
+    
+    fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+    # Frame count is unreliable for some containers and may be 0 or negative
+    total_frames = max(0, int(capture.get(cv2.CAP_PROP_FRAME_COUNT)))
+    
+    analyzer = None
+    exporter = None
+    frames_analyzed = 0
+    
+    try:
+        ok, frame = capture.read()
+        if not ok:
+            raise IOError(f"Could not read frames from {video_path}")
+        
+        # Size the writer from decoded frames, which may be rotated relative to
+        # the container's reported width and height
+        frame_size = frame.shape[1::-1]
+        analyzer = DanceAnalyzer()
+        exporter = AnnotatedVideoExporter(output_path, fps, frame_size, style_config, total_frames)
+        
+        while ok:
+            results = analyzer.pose.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            landmarks = None
+            energy = 0
+            move_detected = False
+            if results.pose_landmarks:
+                landmarks = results.pose_landmarks.landmark
+                move_detected = analyzer.detect_dance_moves(landmarks, style_config)
+                energy = analyzer.movement_history[-1]
+            
+            if not exporter.submit(frame, landmarks, energy, move_detected, analyzer.move_count):
+                break
+            
+            frames_analyzed += 1
+            if progress_callback is not None:
+                progress_callback(frames_analyzed, exporter.frames_written, total_frames)
+            
+            ok, frame = capture.read()
+        
+        exporter.finish()
+    except BaseException:
+        # Includes Streamlit reruns (e.g. the cancel button) interrupting the script
+        if exporter is not None:
+            exporter.cancel()
+        raise
+    finally:
+        capture.release()
+        if analyzer is not None:
+            analyzer.pose.close()
+    
+    return analyzer.get_performance_metrics(style_config)
+
 def main():
     # Initialize session state
     if 'analyzer' not in st.session_state:
@@ -499,6 +680,74 @@ def main():
             else:
                 st.image(image, caption="No pose detected")
                 st.warning("⚠️ No pose detected. Make sure you're visible in the camera.")
+        
+        st.markdown("### 🎬 Export Annotated Video")
+        
+        # Video upload
+        uploaded_video = st.file_uploader(
+            "Choose a dance video",
+            type=['mp4', 'mov', 'avi'],
+            help="Upload MP4, MOV, or AVI files",
+            key="dance_video"
+        )
+        
+        if uploaded_video is not None:
+            col_render, col_cancel = st.columns(2)
+            with col_render:
+                render_clicked = st.button("🎬 Render Video", key="render_btn")
+            with col_cancel:
+                cancel_clicked = st.button("⛔ Cancel", key="cancel_render_btn")
+            
+            if cancel_clicked:
+                st.info("🛑 Video export cancelled")
+            elif render_clicked:
+                with tempfile.NamedTemporaryFile(delete=False, suffix=f".{uploaded_video.name.split('.')[-1]}") as tmp_file:
+                    tmp_file.write(uploaded_video.getvalue())
+                    video_path = tmp_file.name
+                output_path = os.path.splitext(video_path)[0] + "_annotated.mp4"
+                
+                progress_bar = st.progress(0.0, text="Analyzing video...")
+                
+                def update_progress(analyzed, encoded, total):
+                    # Touch Streamlit regularly so a Cancel click can interrupt the run
+                    if analyzed % 10 != 0 and analyzed != total:
+                        return
+                    if total > 0:
+                        progress_bar.progress(
+                            min(1.0, encoded / total),
+                            text=f"Analyzed {analyzed}/{total} frames • Encoded {encoded}/{total} frames"
+                        )
+                    else:
+                        progress_bar.progress(
+                            0.0,
+                            text=f"Analyzed {analyzed} frames • Encoded {encoded} frames"
+                        )
+                
+                try:
+                    video_metrics = export_annotated_video(
+                        video_path,
+                        output_path,
+                        DANCE_STYLES[st.session_state.selected_style],
+                        progress_callback=update_progress
+                    )
+                    progress_bar.progress(1.0, text="Export complete")
+                    st.success(f"✅ Rendered video with {video_metrics['total_moves']} moves detected")
+                    
+                    with open(output_path, "rb") as video_file:
+                        video_data = video_file.read()
+                    os.remove(output_path)
+                    
+                    st.download_button(
+                        label="Download Annotated Video",
+                        data=video_data,
+                        file_name=f"dance_annotated_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp4",
+                        mime="video/mp4"
+                    )
+                except Exception as e:
+                    progress_bar.empty()
+                    st.error(f"Error exporting video: {e}")
+                finally:
+                    os.remove(video_path)
     
     with col2:
         st.markdown("### 📊 Performance Metrics")